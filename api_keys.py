@@ -0,0 +1,38 @@
+import itertools
+import threading
+import time
+
+
+class ApiKeyPool:
+    """
+    Round-robins requests across several API keys so the effective provider
+    rate limit scales with the number of keys. Keys that were rate limited
+    are skipped until their cooldown expires.
+    """
+
+    def __init__(self, keys):
+        self._keys = list(keys)
+        self._cycle = itertools.cycle(self._keys)
+        self._cooldown_until = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def next_key(self):
+        """
+        Returns the next key that is not cooling down. If every key is cooling
+        down, returns the one whose cooldown ends soonest.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for _ in range(len(self._keys)):
+                key = next(self._cycle)
+                if self._cooldown_until.get(key, 0) <= now:
+                    return key
+            return min(self._keys, key=lambda k: self._cooldown_until.get(k, 0))
+
+    def cool_down(self, key, seconds):
+        """Skips key for the next `seconds` seconds."""
+        with self._lock:
+            self._cooldown_until[key] = time.monotonic() + seconds
@@ -1,189 +1,588 @@
+# Patch the stdlib before anything else imports socket/ssl so the blocking
+# NVIDIA calls below yield to other greenlets instead of pinning a worker.
+from gevent import monkey
+monkey.patch_all()
+
 import os
-import requests
-import json
-from flask import Flask, request, jsonify
+import atexit
+import functools
+import hashlib
+import logging
+import logging.handlers
+import queue
+import httpx
+import time
+import redis
+import pybreaker
+import orjson
+import msgspec
+from typing import Annotated
+import textwrap
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from dotenv import load_dotenv
 from flask_cors import CORS
+from flask.json.provider import JSONProvider
+from werkzeug.exceptions import HTTPException
+from llm_cache import LLMCache, RedisLLMCache
+from api_keys import ApiKeyPool
 load_dotenv()
 
+# Log records are put on a queue and written out by a background listener, so
+# request handlers never block on stream I/O while logging.
+LOG_QUEUE = queue.Queue(-1)
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+LOG_LISTENER = logging.handlers.QueueListener(LOG_QUEUE, _log_stream_handler)
+LOG_LISTENER.start()
+atexit.register(LOG_LISTENER.stop)
+logging.getLogger().addHandler(logging.handlers.QueueHandler(LOG_QUEUE))
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# NVIDIA_API_KEYS takes a comma-separated list of keys to spread requests
+# across; a single NVIDIA_API_KEY is still accepted.
+NVIDIA_API_KEYS = [
+    key.strip()
+    for key in os.getenv("NVIDIA_API_KEYS", os.getenv("NVIDIA_API_KEY", "")).split(",")
+    if key.strip()
+]
+if not NVIDIA_API_KEYS:
+    raise RuntimeError("NVIDIA_API_KEYS (or NVIDIA_API_KEY) is not set in the .env file.")
+API_KEYS = ApiKeyPool(NVIDIA_API_KEYS)
+NVIDIA_MODEL_NAME = "meta/llama3-8b-instruct"
+NVIDIA_API_URL = "https://integrate.api.nvidia.com/v1/chat/completions"
+DEFAULT_KEY_COOLDOWN = 10
+UPSTREAM_TIMEOUT = 60
+KEEPALIVE_EXPIRY = 120
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+# With several keys a 429 is handled by rotating to another key instead.
+RETRY_STATUSES = {500, 502, 503, 504} | ({429} if len(API_KEYS) == 1 else set())
+
+# Shared HTTP/2 client: concurrent NVIDIA calls (one per greenlet) are
+# multiplexed as streams over a single pooled TLS connection instead of each
+# needing its own TCP+TLS handshake. Idle connections are kept for
+# KEEPALIVE_EXPIRY seconds (httpx defaults to 5s), so requests after a short
+# idle period still reuse them. The transport retries failed connects.
+# Static headers live on the client; only Authorization varies per request.
+# Completions are requested gzip-compressed and decoded by httpx on read.
+CLIENT = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=MAX_RETRIES,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=KEEPALIVE_EXPIRY),
+    ),
+    headers={
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+        "Content-Type": "application/json"
+    },
+    timeout=UPSTREAM_TIMEOUT,
+)
+
+
+def _auth_headers(api_key):
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def _retry_after_seconds(nvidia_response):
+    try:
+        return float(nvidia_response.headers.get("Retry-After", DEFAULT_KEY_COOLDOWN))
+    except ValueError:
+        return DEFAULT_KEY_COOLDOWN
+
+
+# Opens after 5 consecutive upstream failures so requests fail fast with a 503
+# for 30s instead of each waiting out the 60s timeout during an NVIDIA outage.
+# Client errors (4xx, including rate limiting) are not outages and don't count.
+BREAKER = pybreaker.CircuitBreaker(
+    fail_max=5,
+    reset_timeout=30,
+    exclude=[
+        lambda e: isinstance(e, httpx.HTTPStatusError)
+        and e.response.status_code < 500
+    ],
+)
+
+
+@BREAKER
+def _post_nvidia(payload, stream=False):
+    """
+    Posts the payload to NVIDIA using the next available API key and returns
+    the checked response. A rate-limited key is put on cooldown and the
+    request is retried with the next key; RETRY_STATUSES are retried up to
+    MAX_RETRIES times with exponential backoff.
+    """
+    body = orjson.dumps(payload)
+    key_rotations = 0
+    retries = 0
+    while True:
+        api_key = API_KEYS.next_key()
+        nvidia_request = CLIENT.build_request("POST", NVIDIA_API_URL, headers=_auth_headers(api_key), content=body)
+        nvidia_response = CLIENT.send(nvidia_request, stream=stream)
+        status = nvidia_response.status_code
+        if status == 429 and key_rotations < len(API_KEYS) - 1:
+            API_KEYS.cool_down(api_key, _retry_after_seconds(nvidia_response))
+            key_rotations += 1
+        elif status in RETRY_STATUSES and retries < MAX_RETRIES:
+            time.sleep(RETRY_BACKOFF * 2 ** retries)
+            retries += 1
+        else:
+            break
+        nvidia_response.close()
+    if nvidia_response.is_error:
+        # Release a streamed response's pooled HTTP/2 stream before raising.
+        nvidia_response.close()
+        nvidia_response.raise_for_status()
+    return nvidia_response
+
+
+def _warm_nvidia_connection():
+    """
+    Opens a TLS connection to the NVIDIA API and leaves it in the client pool,
+    so a user request within KEEPALIVE_EXPIRY seconds of startup skips the
+    DNS/TCP/TLS handshake. After that the idle connection is dropped.
+    """
+    try:
+        CLIENT.head(NVIDIA_API_URL, headers=_auth_headers(API_KEYS.next_key()), timeout=10)
+    except httpx.HTTPError as e:
+        logger.warning("Could not pre-warm NVIDIA API connection: %s", e)
+
+
+threading.Thread(target=_warm_nvidia_connection, daemon=True).start()
+
+# With REDIS_URL set, completions are cached in Redis so every worker shares
+# them, and Idempotency-Key replays are enabled; otherwise caching is per-process.
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS = redis.Redis.from_url(REDIS_URL) if REDIS_URL else None
+CACHE = RedisLLMCache(REDIS, ttl=3600) if REDIS else LLMCache(maxsize=1024, ttl=3600)
+IDEMPOTENCY_TTL = 600
+
+# Output budgets sized to the JSON objects the prompts ask for. In JSON mode
+# generation ends as soon as the object is closed.
+VALIDATOR_MAX_TOKENS = 512
+FAQ_MAX_TOKENS = 600
+
+# Prompt templates are dedented once at import. The per-request fields come last
+# so the instruction prefix is byte-identical across calls and can be reused by
+# the provider's prefix (KV) cache.
+VALIDATOR_PROMPT = textwrap.dedent("""\
+    You are an expert startup validator and business analyst. Your task is to evaluate the following startup idea comprehensively.
+
+    Respond ONLY with a JSON object of the form:
+    {{"rating": <integer 1-10>, "justification": "<concise justification for the rating, highlighting key strengths and weaknesses>", "sentiment": "<'Highly Positive', 'Positive', 'Neutral', 'Slightly Negative' or 'Negative'>", "sentiment_explanation": "<reasons behind the sentiment, considering market trends and potential>", "suggestions": [{{"title": "<suggestion>", "explanation": "<how it improves market fit, scalability, technical feasibility or execution>"}}, ...], "related_ideas": [{{"name": "<idea name>", "description": "<similar, complementary or adjacent business idea>", "url": "<relevant reference URL, or null>"}}, ...]}}
+    Give 2-3 suggestions and up to 3 related ideas.
+
+    Startup Name: {startupName}
+    Description: {description}
+    Target Market: {targetMarket}
+    Business Model: {businessModel}
+    Competitive Advantage: {competitiveAdvantage}
+    """)
+
+FAQ_PROMPT = textwrap.dedent("""\
+    You are an expert AI assistant specializing in creating comprehensive Frequently Asked Questions (FAQ) sections for new startups.
+    Your goal is to anticipate common questions potential customers, investors, or users might have about the startup.
+
+    Generate a list of 5-8 common and insightful FAQs with concise answers, e.g. what the startup is and its core value proposition, or how it works.
+    Respond ONLY with a JSON object of the form:
+    {{"faqs": [{{"question": "<question>", "answer": "<concise answer>"}}, ...]}}
+
+    Startup Name: {startupName}
+    Startup Description: {startupDescription}
+    """)
+
+# Several startups are row-marshaled into one prompt so a batch costs a single
+# upstream round-trip. Latency grows with batch size, so it is capped.
+MAX_BATCH_SIZE = 8
+BATCH_TOKENS_PER_STARTUP = 300
+BATCH_VALIDATOR_PROMPT = textwrap.dedent("""\
+    You are an expert startup validator and business analyst. Your task is to evaluate each of the following startup ideas independently.
+
+    Respond ONLY with a JSON object of the form:
+    {{"results": [{{"id": <startup number>, "rating": <integer 1-10>, "justification": "<concise justification>", "sentiment": "<'Highly Positive', 'Positive', 'Neutral', 'Slightly Negative' or 'Negative'>", "suggestions": ["<suggestion>", ...], "related_ideas": ["<similar or adjacent business idea>", ...]}}, ...]}}
+    Include exactly one entry per startup, using the startup's number as its id.
+
+    {startups}
+    """)
+BATCH_STARTUP_BLOCK = textwrap.dedent("""\
+    ## Startup {id}
+    Startup Name: {startupName}
+    Description: {description}
+    Target Market: {targetMarket}
+    Business Model: {businessModel}
+    Competitive Advantage: {competitiveAdvantage}
+    """)
+
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
+
+
+class ValidateRequest(msgspec.Struct):
+    startupName: NonEmptyStr
+    description: NonEmptyStr
+    targetMarket: NonEmptyStr
+    businessModel: NonEmptyStr
+    competitiveAdvantage: NonEmptyStr
+
+
+class BatchValidateRequest(msgspec.Struct):
+    startups: Annotated[list[ValidateRequest], msgspec.Meta(min_length=1, max_length=MAX_BATCH_SIZE)]
+
+
+class FaqRequest(msgspec.Struct):
+    startupName: NonEmptyStr
+    startupDescription: NonEmptyStr
+
+
+# Upstream calls currently in flight, keyed by cache key, so concurrent requests
+# with an identical payload wait on one NVIDIA call instead of each making one.
+INFLIGHT = {}
+INFLIGHT_LOCK = threading.Lock()
+# How long a coalesced caller waits for the owning call: one timeout per
+# key rotation and status retry, plus the retry backoff.
+COALESCE_WAIT_TIMEOUT = (
+    (len(API_KEYS) + MAX_RETRIES) * UPSTREAM_TIMEOUT
+    + sum(RETRY_BACKOFF * 2 ** n for n in range(MAX_RETRIES))
+    + 5
+)
+
+
+class NvidiaResponseError(Exception):
+    """NVIDIA answered, but without a usable completion."""
+
+    def __init__(self, message, raw_response):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+class NvidiaTimeoutError(Exception):
+    """Gave up waiting on an identical in-flight NVIDIA call."""
+
+
+def _post_nvidia_coalesced(cache_key, payload):
+    """
+    Posts the payload to NVIDIA and returns the checked response. Callers that
+    arrive while an identical request is in flight share its response.
+    """
+    with INFLIGHT_LOCK:
+        future = INFLIGHT.get(cache_key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            INFLIGHT[cache_key] = future
+    if not is_owner:
+        try:
+            return future.result(timeout=COALESCE_WAIT_TIMEOUT)
+        except FutureTimeoutError:
+            raise NvidiaTimeoutError(f"Timed out after {COALESCE_WAIT_TIMEOUT:.0f}s waiting for the NVIDIA API.")
+
+    try:
+        nvidia_response = _post_nvidia(payload)
+    except BaseException as e:
+        # Includes gevent.Timeout/GreenletExit (e.g. on worker shutdown), so
+        # waiters are released immediately instead of hitting their timeout.
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(nvidia_response)
+        return nvidia_response
+    finally:
+        with INFLIGHT_LOCK:
+            INFLIGHT.pop(cache_key, None)
+
+
+def _build_payload(messages, *, max_tokens, temperature=0.7, top_p=0.9, **options):
+    return {
+        "model": NVIDIA_MODEL_NAME,
+        "messages": messages,
+        "temperature": temperature,
+        "top_p": top_p,
+        "max_tokens": max_tokens,
+        **options,
+        "stream": False
+    }
+
+
+def _call_nvidia(messages, *, max_tokens, temperature=0.7, top_p=0.9, parse=None, **options):
+    """
+    Returns the completion text for messages, served from the cache or a
+    concurrent identical request when possible. If given, parse is applied to
+    the text and its result returned; text that fails to parse is not cached,
+    and a cached text that fails to parse is refetched and overwritten.
+    Extra options (stop, response_format, ...) are passed through in the payload.
+    """
+    payload = _build_payload(messages, max_tokens=max_tokens, temperature=temperature, top_p=top_p, **options)
+    cache_key = CACHE.make_key(payload)
+    ai_text = CACHE.get(cache_key)
+    if ai_text is not None and _parses(ai_text, parse):
+        return parse(ai_text) if parse else ai_text
+
+    nvidia_response = _post_nvidia_coalesced(cache_key, payload)
+    try:
+        response_data = orjson.loads(nvidia_response.content)
+    except orjson.JSONDecodeError:
+        raise NvidiaResponseError("Invalid JSON response from NVIDIA API.", nvidia_response.text)
+    if not (response_data and "choices" in response_data and response_data["choices"]):
+        raise NvidiaResponseError("No valid response from NVIDIA API.", response_data)
+    ai_text = response_data["choices"][0]["message"]["content"]
+    result = parse(ai_text) if parse else ai_text
+    CACHE.set(cache_key, ai_text)
+    return result
+
+
+def _stream_nvidia(messages, *, max_tokens, temperature=0.7, top_p=0.9, parse=None, **options):
+    """
+    Starts a streaming completion and returns an iterator of content deltas.
+    The upstream request is made eagerly so connection and HTTP errors surface
+    before the client response has started. parse has the same caching role
+    as in _call_nvidia.
+    """
+    payload = _build_payload(messages, max_tokens=max_tokens, temperature=temperature, top_p=top_p, **options)
+    cache_key = CACHE.make_key(payload)
+    cached_text = CACHE.get(cache_key)
+    if cached_text is not None and _parses(cached_text, parse):
+        return [cached_text]
+    payload["stream"] = True
+    return _iter_nvidia_deltas(_post_nvidia(payload, stream=True), cache_key, parse)
+
+
+def _parses(ai_text, parse):
+    """True when ai_text is accepted by parse (or there is nothing to check)."""
+    if parse is None:
+        return True
+    try:
+        parse(ai_text)
+    except NvidiaResponseError:
+        return False
+    return True
+
+
+def idempotent(view):
+    """
+    Replays the stored JSON response when a client retries with the same
+    Idempotency-Key header, instead of calling NVIDIA again. Only successful
+    responses are stored, for IDEMPOTENCY_TTL seconds, together with a hash of
+    the request body; reusing a key with a different body is rejected with
+    422. Requires Redis.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if REDIS is None or not idempotency_key:
+            return view(*args, **kwargs)
+
+        redis_key = f"idem:{request.path}:{idempotency_key}"
+        body_hash = hashlib.sha256(request.get_data()).hexdigest()
+        try:
+            stored = REDIS.get(redis_key)
+        except redis.exceptions.RedisError:
+            return view(*args, **kwargs)
+        if stored is not None:
+            stored = orjson.loads(stored)
+            if stored["body_hash"] != body_hash:
+                return jsonify({"error": "Idempotency-Key was already used with a different request body."}), 422
+            return Response(stored["response"], mimetype="application/json")
+
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == "application/json":
+            try:
+                REDIS.setex(redis_key, IDEMPOTENCY_TTL, orjson.dumps({
+                    "body_hash": body_hash,
+                    "response": response.get_data(as_text=True),
+                }))
+            except redis.exceptions.RedisError:
+                pass
+        return response
+    return wrapper
+
+
+def _decode_request(struct_type):
+    """
+    Decodes and validates the JSON request body as struct_type in one pass,
+    memoizing the result on g so the body is parsed at most once per request.
+    """
+    if "_request_body" not in g:
+        g._request_body = msgspec.json.decode(request.get_data(), type=struct_type)
+    return g._request_body
+
+
+def _wants_event_stream():
+    """True when the client explicitly asked for a text/event-stream response."""
+    best = request.accept_mimetypes.best_match(["application/json", "text/event-stream"])
+    return best == "text/event-stream"
+
+
+def _iter_nvidia_deltas(nvidia_response, cache_key, parse=None):
+    """
+    Yields content deltas from a streaming NVIDIA completion as they arrive.
+    The assembled text is cached only if the stream reached [DONE] after a
+    natural stop (not a max_tokens cut-off) and the text is accepted by parse.
+    """
+    chunks = []
+    finish_reason = None
+    completed = False
+    try:
+        for line in nvidia_response.iter_lines():
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                completed = True
+                break
+            choices = orjson.loads(data).get("choices")
+            if not choices:
+                continue
+            finish_reason = choices[0].get("finish_reason") or finish_reason
+            content = choices[0].get("delta", {}).get("content")
+            if content:
+                chunks.append(content)
+                yield content
+    finally:
+        nvidia_response.close()
+    ai_text = "".join(chunks)
+    if completed and finish_reason == "stop" and ai_text and _parses(ai_text, parse):
+        CACHE.set(cache_key, ai_text)
+
+
+def _sse_frames(contents):
+    """Wraps each content string in an SSE frame, ending with a [DONE] marker."""
+    for content in contents:
+        yield b"data: " + orjson.dumps({"content": content}) + b"\n\n"
+    yield b"data: [DONE]\n\n"
+
+
+def _event_stream(contents):
+    return Response(stream_with_context(_sse_frames(contents)), mimetype="text/event-stream")
+
+
+def _parse_json_object(ai_text):
+    """Decodes a JSON-mode completion, which must be a JSON object."""
+    try:
+        result = orjson.loads(ai_text)
+    except orjson.JSONDecodeError:
+        result = None
+    if not isinstance(result, dict):
+        raise NvidiaResponseError("Invalid JSON response from NVIDIA API.", ai_text)
+    return result
+
+
+def _parse_batch_results(ai_text, count):
+    """Splits a batch completion into one assessment per startup, in order."""
+    items = _parse_json_object(ai_text).get("results")
+    if not isinstance(items, list):
+        raise NvidiaResponseError("NVIDIA API returned an incomplete batch.", ai_text)
+    assessments = {str(item.get("id")): item for item in items if isinstance(item, dict)}
+    results = [assessments.get(str(i)) for i in range(1, count + 1)]
+    if None in results:
+        raise NvidiaResponseError("NVIDIA API returned an incomplete batch.", ai_text)
+    return results
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider that uses orjson for request and response bodies."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app) 
+
+@app.errorhandler(msgspec.DecodeError)
+def handle_invalid_request(e):
+    return jsonify({"error": f"Invalid request body: {e}"}), 400
+
+@app.errorhandler(pybreaker.CircuitBreakerError)
+def handle_nvidia_unavailable(e):
+    logger.warning("NVIDIA circuit breaker is open; rejecting %s", request.path)
+    return jsonify({"error": "AI service temporarily unavailable"}), 503
+
+@app.errorhandler(httpx.HTTPError)
+def handle_nvidia_request_error(e):
+    logger.error("NVIDIA API request failed for %s", request.path, exc_info=e)
+    return jsonify({"error": f"NVIDIA API request failed: {e}", "details": str(e)}), 500
+
+@app.errorhandler(NvidiaTimeoutError)
+def handle_nvidia_timeout(e):
+    logger.warning("%s (%s)", e, request.path)
+    return jsonify({"error": str(e)}), 504
+
+@app.errorhandler(NvidiaResponseError)
+def handle_nvidia_response_error(e):
+    logger.error("%s (%s) Raw response: %s", e, request.path, e.raw_response)
+    return jsonify({"error": str(e), "raw_response": e.raw_response}), 500
+
+@app.errorhandler(Exception)
+def handle_unexpected_error(e):
+    if isinstance(e, HTTPException):
+        return e
+    logger.error("An unexpected error occurred for %s", request.path, exc_info=e)
+    return jsonify({"error": f"An unexpected error occurred: {e}", "details": str(e)}), 500
+
 @app.route('/')
 def home():
     """Simple endpoint to confirm the backend is running."""
     return "AI Startup Validator & FAQ Builder Backend is running!"
 
 @app.route('/validate_startup', methods=['POST'])
+@idempotent
 def validate_startup():
     """
     Receives startup details, calls NVIDIA AI for validation,
     and returns the assessment.
     """
-    NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
-    if not NVIDIA_API_KEY:
-        return jsonify({"error": "NVIDIA_API_KEY is not set in the .env file."}), 500
-    NVIDIA_MODEL_NAME = "meta/llama3-8b-instruct" 
-    NVIDIA_API_URL = "https://integrate.api.nvidia.com/v1/chat/completions"
+    startup = _decode_request(ValidateRequest)
+    messages = [{"role": "user", "content": VALIDATOR_PROMPT.format_map(msgspec.structs.asdict(startup))}]
+    options = {"max_tokens": VALIDATOR_MAX_TOKENS, "response_format": {"type": "json_object"}}
 
-    try:
-        data = request.get_json()
-        startup_name = data.get('startupName')
-        description = data.get('description')
-        target_market = data.get('targetMarket')
-        business_model = data.get('businessModel')
-        competitive_advantage = data.get('competitiveAdvantage')
-
-        if not all([startup_name, description, target_market, business_model, competitive_advantage]):
-            return jsonify({"error": "Missing one or more required startup details."}), 400
-
-        headers = {
-            "Authorization": f"Bearer {NVIDIA_API_KEY}",
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        }
-
-        prompt = f"""
-        You are an expert startup validator and business analyst. Your task is to evaluate the following startup idea comprehensively.
-
-        Startup Name: {startup_name}
-        Description: {description}
-        Target Market: {target_market}
-        Business Model: {business_model}
-        Competitive Advantage: {competitive_advantage}
-
-        Please provide a detailed assessment structured as follows, using Markdown for clear formatting:
-
-        **Startup Rating:** [X/10] - Provide a concise justification for this rating, highlighting key strengths and weaknesses.
-        **Sentiment Analysis:** [Overall sentiment of the idea's viability, e.g., 'Highly Positive', 'Positive', 'Neutral', 'Slightly Negative', 'Negative'] - Explain the reasons behind this sentiment based on the provided details, considering market trends and potential.
-        **Suggestions for Improvement:**
-        * Suggestion 1: Explain how this improves the idea, focusing on market fit, scalability, technical feasibility, or execution strategy.
-        * Suggestion 2: Another actionable suggestion with explanation.
-        * Suggestion 3: A third practical suggestion (if applicable).
-        **Relevant Ideas & References:**
-        * Idea 1 Name: Brief description of a similar, complementary, or adjacent business idea. (If relevant, include a real or hypothetical URL reference, e.g., 'https://www.example.com/related_project')
-        * Idea 2 Name: Brief description. (If relevant, include a real or hypothetical URL reference)
-        * Idea 3 Name: Brief description. (If relevant, include a real or hypothetical URL reference)
-        """
-
-        payload = {
-            "model": NVIDIA_MODEL_NAME,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "max_tokens": 1024,
-            "stream": False
-        }
-
-        nvidia_response = requests.post(NVIDIA_API_URL, headers=headers, json=payload, timeout=60)
-        nvidia_response.raise_for_status()
-        response_data = nvidia_response.json()
+    if _wants_event_stream():
+        return _event_stream(_stream_nvidia(messages, parse=_parse_json_object, **options))
+    return jsonify({"success": True, "ai_response": _call_nvidia(messages, parse=_parse_json_object, **options)})
 
-        if response_data and "choices" in response_data and response_data["choices"]:
-            ai_text = response_data["choices"][0]["message"]["content"]
-            return jsonify({"success": True, "ai_response": ai_text})
-        else:
-            print(f"ERROR: No valid response from NVIDIA AI for validator. Raw response: {json.dumps(response_data, indent=2)}")
-            return jsonify({"error": "No valid response from NVIDIA API.", "raw_response": response_data}), 500
 
-    except requests.exceptions.RequestException as e:
-        print(f"ERROR: NVIDIA API request failed for validator: {e}")
-        return jsonify({"error": f"NVIDIA API request failed: {e}", "details": str(e)}), 500
-    except json.JSONDecodeError:
-        response_text = nvidia_response.text if 'nvidia_response' in locals() else 'No response from API'
-        print(f"ERROR: Invalid JSON response from NVIDIA API for validator. Raw response: {response_text}")
-        return jsonify({"error": "Invalid JSON response from NVIDIA API.", "raw_response": response_text}), 500
-    except Exception as e:
-        print(f"ERROR: An unexpected error occurred for validator: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {e}", "details": str(e)}), 500
+@app.route('/validate_startup_batch', methods=['POST'])
+@idempotent
+def validate_startup_batch():
+    """
+    Receives up to MAX_BATCH_SIZE startups, validates them all with a single
+    NVIDIA AI call, and returns one assessment per startup.
+    """
+    startups = _decode_request(BatchValidateRequest).startups
+    blocks = "\n".join(
+        BATCH_STARTUP_BLOCK.format_map(dict(msgspec.structs.asdict(startup), id=i))
+        for i, startup in enumerate(startups, start=1)
+    )
+    messages = [{"role": "user", "content": BATCH_VALIDATOR_PROMPT.format(startups=blocks)}]
+
+    results = _call_nvidia(
+        messages,
+        max_tokens=BATCH_TOKENS_PER_STARTUP * len(startups),
+        response_format={"type": "json_object"},
+        parse=lambda ai_text: _parse_batch_results(ai_text, len(startups)),
+    )
+    return jsonify({"success": True, "results": results})
 
 
 @app.route('/generate_faq', methods=['POST'])
+@idempotent
 def generate_faq():
     """
     Receives startup details, uses NVIDIA AI to generate FAQs,
     and returns the generated FAQ section.
     """
-    NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
+    startup = _decode_request(FaqRequest)
+    messages = [{"role": "user", "content": FAQ_PROMPT.format_map(msgspec.structs.asdict(startup))}]
+    options = {"max_tokens": FAQ_MAX_TOKENS, "response_format": {"type": "json_object"}}
 
-    if not NVIDIA_API_KEY:
-        return jsonify({"error": "NVIDIA_API_KEY is not set in the .env file."}), 500
-    NVIDIA_MODEL_NAME = "meta/llama3-8b-instruct" 
-    NVIDIA_API_URL = "https://integrate.api.nvidia.com/v1/chat/completions"
-
-    try:
-        data = request.get_json()
-        startup_name = data.get('startupName')
-        startup_description = data.get('startupDescription')
-
-        if not all([startup_name, startup_description]):
-            return jsonify({"error": "Missing startup name or description."}), 400
-
-        headers = {
-            "Authorization": f"Bearer {NVIDIA_API_KEY}",
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        }
-
-        prompt = f"""
-        You are an expert AI assistant specializing in creating comprehensive Frequently Asked Questions (FAQ) sections for new startups.
-        Your goal is to anticipate common questions potential customers, investors, or users might have about the startup.
-
-        Startup Name: {startup_name}
-        Startup Description: {startup_description}
-
-        Generate a list of 5-8 common and insightful FAQs with concise answers.
-        Format your response clearly using Markdown, with each question as a bold heading and the answer following directly.
-
-        Example Format:
-        **Q: What is [Startup Name]?**
-        A: [Concise answer about what it does and its core value proposition.]
-
-        **Q: How does [Startup Name] work?**
-        A: [Explanation of the basic mechanics or user flow.]
-
-        --- Start Generating FAQs ---
-        """
-
-        payload = {
-            "model": NVIDIA_MODEL_NAME,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "max_tokens": 1000,
-            "stream": False
-        }
-
-        nvidia_response = requests.post(NVIDIA_API_URL, headers=headers, json=payload, timeout=60)
-        nvidia_response.raise_for_status()
-        response_data = nvidia_response.json()
-
-        if response_data and "choices" in response_data and response_data["choices"]:
-            ai_text = response_data["choices"][0]["message"]["content"]
-            return jsonify({"success": True, "faq_content": ai_text})
-        else:
-            print(f"ERROR: No valid response from NVIDIA AI for FAQ. Raw response: {json.dumps(response_data, indent=2)}")
-            return jsonify({"error": "No valid response from NVIDIA API.", "raw_response": response_data}), 500
-
-    except requests.exceptions.RequestException as e:
-        print(f"ERROR: NVIDIA API request failed for FAQ: {e}")
-        return jsonify({"error": f"NVIDIA API request failed: {e}", "details": str(e)}), 500
-    except json.JSONDecodeError:
-        response_text = nvidia_response.text if 'nvidia_response' in locals() else 'No response from API'
-        print(f"ERROR: Invalid JSON response from NVIDIA API for FAQ. Raw response: {response_text}")
-        return jsonify({"error": "Invalid JSON response from NVIDIA API.", "raw_response": response_text}), 500
-    except Exception as e:
-        print(f"ERROR: An unexpected error occurred for FAQ: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {e}", "details": str(e)}), 500
+    if _wants_event_stream():
+        return _event_stream(_stream_nvidia(messages, parse=_parse_json_object, **options))
+    return jsonify({"success": True, "faq_content": _call_nvidia(messages, parse=_parse_json_object, **options)})
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
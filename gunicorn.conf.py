@@ -0,0 +1,11 @@
+# Production server settings: `gunicorn app:app` picks this file up automatically.
+# gevent workers multiplex the I/O-bound NVIDIA calls onto greenlets, so each
+# worker can hold many in-flight requests while waiting on the upstream API.
+bind = "127.0.0.1:5000"
+worker_class = "gevent"
+workers = 2
+worker_connections = 1000
+# With gevent workers this is the worker heartbeat timeout: a worker whose
+# event loop has not checked in for 90s is restarted. It does not limit how long
+# a single request (e.g. one waiting on a slow or coalesced NVIDIA call) may run.
+timeout = 90
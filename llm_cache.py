@@ -0,0 +1,65 @@
+import hashlib
+import threading
+
+import orjson
+import redis
+from cachetools import TTLCache
+
+
+class LLMCache:
+    """
+    In-memory LRU + TTL cache for NVIDIA completions, keyed by a hash of
+    the request payload.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(payload):
+        """
+        Returns a stable sha256 key for a chat-completions payload. Every field
+        except "stream" is hashed, so options such as response_format or stop
+        that change the output also change the key.
+        """
+        canonical = orjson.dumps(
+            {field: value for field, value in payload.items() if field != "stream"},
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(canonical).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+
+class RedisLLMCache:
+    """
+    Redis-backed counterpart of LLMCache, shared by every worker and kept
+    across restarts. Redis errors are treated as cache misses.
+    """
+
+    make_key = staticmethod(LLMCache.make_key)
+
+    def __init__(self, client, ttl=3600, prefix="llm:"):
+        self._client = client
+        self._ttl = ttl
+        self._prefix = prefix
+
+    def get(self, key):
+        try:
+            value = self._client.get(self._prefix + key)
+        except redis.exceptions.RedisError:
+            return None
+        return value.decode() if value is not None else None
+
+    def set(self, key, value):
+        try:
+            self._client.setex(self._prefix + key, self._ttl, value)
+        except redis.exceptions.RedisError:
+            pass